@@ -1,7 +1,12 @@
-from flask import Flask, render_template, request, jsonify
-from livereload import Server
-import csv
 import io
+
+from flask import Flask, render_template, request, jsonify, Response
+from livereload import Server
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.compute as pc
 from config import LAJI_API_ACCESS_TOKEN, LAJI_API_BASE_URL
 
 app = Flask(__name__)
@@ -58,6 +63,98 @@ def get_config():
         "base_url": LAJI_API_BASE_URL
     })
 
+def _float_or_null(values):
+    """
+    Cast a string array to float64, nulling out values that don't parse.
+
+    Keeps the per-row tolerance of the old csv-based parsing: one malformed
+    number skips that row instead of failing the whole upload. The fast
+    vectorized cast handles clean batches; only batches containing a bad
+    value fall back to per-element conversion.
+    """
+    trimmed = pc.utf8_trim_whitespace(values)
+    try:
+        return pc.cast(trimmed, pa.float64())
+    except pa.ArrowInvalid:
+        converted = []
+        for value in trimmed.to_pylist():
+            try:
+                converted.append(float(value))
+            except (TypeError, ValueError):
+                converted.append(None)
+        return pa.array(converted, type=pa.float64())
+
+
+def _utf8_replaced(stream):
+    """
+    Rewind an upload stream and re-encode it as clean UTF-8.
+
+    Invalid byte sequences become replacement characters, matching the
+    old decode(\"utf-8\", errors=\"replace\") tolerance. Only used as the
+    slow path after the Arrow reader rejects the raw bytes, so buffering
+    the body here is acceptable.
+    """
+    stream.seek(0)
+    text = stream.read().decode("utf-8", errors="replace")
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def _read_tsv_batches(source, columns):
+    """
+    Stream a TSV upload as Arrow record batches over the given columns.
+
+    All columns are read as strings. Rows the Arrow parser rejects as
+    ragged (too few or too many fields) are not lost: their raw text is
+    captured and re-parsed per row against the header, and the recovered
+    values are returned as one extra trailing batch with absent fields as
+    nulls. This mirrors how the old csv.DictReader kept short and long
+    rows instead of dropping them.
+    """
+    # The header line tells us where each wanted column sits in ragged
+    # rows; the stream is rewound so Arrow still sees the whole file
+    header = source.readline().decode("utf-8", errors="replace").rstrip("\r\n").split("\t")
+    source.seek(0)
+
+    invalid_rows = []
+
+    def _capture_invalid_row(row):
+        # Keep the raw text so the row can be recovered below
+        if row.text is not None:
+            invalid_rows.append(row.text)
+        return "skip"
+
+    reader = pa.csv.open_csv(
+        source,
+        parse_options=pa.csv.ParseOptions(
+            delimiter="\t",
+            invalid_row_handler=_capture_invalid_row,
+        ),
+        convert_options=pa.csv.ConvertOptions(
+            include_columns=columns,
+            include_missing_columns=True,
+            column_types={name: pa.string() for name in columns},
+            null_values=[""],
+            strings_can_be_null=True,
+        ),
+    )
+    batches = list(reader)
+
+    if invalid_rows:
+        positions = {name: header.index(name) for name in columns if name in header}
+        arrays = []
+        for name in columns:
+            pos = positions.get(name)
+            values = []
+            for text in invalid_rows:
+                fields = text.split("\t")
+                value = fields[pos].strip() if pos is not None and pos < len(fields) else ""
+                values.append(value or None)
+            arrays.append(pa.array(values, type=pa.string()))
+        batches.append(pa.RecordBatch.from_arrays(arrays, names=columns))
+
+    return batches
+
+
 @app.post("/api/upload")
 def upload_tsv():
     if "file" not in request.files:
@@ -68,38 +165,56 @@ def upload_tsv():
         return jsonify({"error": "No selected file"}), 400
 
     try:
-        # Read as text safely from uploaded bytes
-        raw_bytes = file.read()
-        text = raw_bytes.decode("utf-8", errors="replace")
-        reader = csv.DictReader(io.StringIO(text), delimiter="\t")
+        # Stream the TSV through pyarrow's native CSV reader so parsing
+        # overlaps the upload instead of buffering the whole body first.
+        # Only the needed columns are read; ragged rows are recovered per
+        # row and numeric conversion is done null-on-error per column,
+        # matching the old per-row tolerance
+        columns = ["WGS84 N", "WGS84 E", "Individual count (interpreted)"]
+        try:
+            batches = _read_tsv_batches(file.stream, columns)
+        except pa.ArrowInvalid:
+            # A single invalid UTF-8 byte aborts the Arrow reader; decode
+            # the upload with replacement characters like the old
+            # text-mode parsing did, then parse once more
+            batches = _read_tsv_batches(_utf8_replaced(file.stream), columns)
 
-        points = []  # [lat, lon, weight]
-        for row in reader:
-            try:
-                lat_str = (row.get("WGS84 N") or "").strip()
-                lon_str = (row.get("WGS84 E") or "").strip()
-                if not lat_str or not lon_str:
-                    continue
-                latitude = float(lat_str)
-                longitude = float(lon_str)
-
-                weight_value = 1.0
-                count_str = (row.get("Individual count (interpreted)") or "").strip()
-                if count_str:
-                    try:
-                        weight_value = float(count_str)
-                    except ValueError:
-                        weight_value = 1.0
-
-                points.append([latitude, longitude, weight_value])
-            except Exception:
-                # Skip problematic rows silently
-                continue
-
-        if not points:
+        lat_chunks = []
+        lon_chunks = []
+        weight_chunks = []
+        for batch in batches:
+            lat = _float_or_null(batch["WGS84 N"])
+            lon = _float_or_null(batch["WGS84 E"])
+            # Drop rows without coordinates
+            valid = pc.and_(pc.is_valid(lat), pc.is_valid(lon))
+            lat_chunks.append(pc.filter(lat, valid).to_numpy())
+            lon_chunks.append(pc.filter(lon, valid).to_numpy())
+            # Rows without a parseable individual count get weight 1.0
+            counts = pc.fill_null(_float_or_null(batch["Individual count (interpreted)"]), 1.0)
+            weight_chunks.append(pc.filter(counts, valid).to_numpy())
+
+        latitudes = np.concatenate(lat_chunks) if lat_chunks else np.empty(0)
+        if latitudes.size == 0:
             return jsonify({"error": "No valid coordinates found in file"}), 400
 
-        return jsonify({"points": points, "count": len(points)})
+        longitudes = np.concatenate(lon_chunks)
+        weights = np.concatenate(weight_chunks)
+
+        points = np.stack([latitudes, longitudes, weights], axis=1)
+
+        # orjson serializes the NumPy array directly, skipping both the
+        # .tolist() round-trip and stdlib json's per-float formatting
+        return Response(
+            orjson.dumps(
+                {"points": points, "count": len(points)},
+                option=orjson.OPT_SERIALIZE_NUMPY,
+            ),
+            mimetype="application/json",
+        )
+    except pa.ArrowInvalid:
+        # Unreadable input (e.g. an empty file) yields no points, same as
+        # a file where every row was skipped
+        return jsonify({"error": "No valid coordinates found in file"}), 400
     except Exception as exc:
         return jsonify({"error": f"Failed to parse file: {exc}"}), 500
 
@@ -114,29 +229,45 @@ def upload_tsv_richness():
         return jsonify({"error": "No selected file"}), 400
 
     try:
-        raw_bytes = file.read()
-        text = raw_bytes.decode("utf-8", errors="replace")
-        reader = csv.DictReader(io.StringIO(text), delimiter="\t")
+        columns = ["WGS84 N", "WGS84 E", "Scientific name"]
+        try:
+            batches = _read_tsv_batches(file.stream, columns)
+        except pa.ArrowInvalid:
+            # Same replacement-decoding retry as /api/upload
+            batches = _read_tsv_batches(_utf8_replaced(file.stream), columns)
 
-        records = []  # {lat, lon, name}
-        for row in reader:
-            try:
-                lat_str = (row.get("WGS84 N") or "").strip()
-                lon_str = (row.get("WGS84 E") or "").strip()
-                name = (row.get("Scientific name") or "").strip()
-                if not lat_str or not lon_str or not name:
-                    # Skip rows without coordinates or scientific name
-                    continue
-                latitude = float(lat_str)
-                longitude = float(lon_str)
-                records.append({"lat": latitude, "lon": longitude, "name": name})
-            except Exception:
-                continue
-
-        if not records:
+        lat_chunks = []
+        lon_chunks = []
+        names = []
+        for batch in batches:
+            lat = _float_or_null(batch["WGS84 N"])
+            lon = _float_or_null(batch["WGS84 E"])
+            # Keep only rows with coordinates and a scientific name
+            valid = pc.and_(
+                pc.and_(pc.is_valid(lat), pc.is_valid(lon)),
+                pc.is_valid(batch["Scientific name"]),
+            )
+            lat_chunks.append(pc.filter(lat, valid).to_numpy())
+            lon_chunks.append(pc.filter(lon, valid).to_numpy())
+            names.extend(pc.filter(batch["Scientific name"], valid).to_pylist())
+
+        latitudes = np.concatenate(lat_chunks) if lat_chunks else np.empty(0)
+        if latitudes.size == 0:
             return jsonify({"error": "No valid records with coordinates and Scientific name found in file"}), 400
 
-        return jsonify({"records": records, "count": len(records)})
+        longitudes = np.concatenate(lon_chunks)
+
+        records = [
+            {"lat": lat, "lon": lon, "name": name}
+            for lat, lon, name in zip(latitudes.tolist(), longitudes.tolist(), names)
+        ]
+
+        return Response(
+            orjson.dumps({"records": records, "count": len(records)}),
+            mimetype="application/json",
+        )
+    except pa.ArrowInvalid:
+        return jsonify({"error": "No valid records with coordinates and Scientific name found in file"}), 400
     except Exception as exc:
         return jsonify({"error": f"Failed to parse file: {exc}"}), 500
 
@@ -0,0 +1,219 @@
+"""
+Command line tool for generating analysis maps from occurrence data.
+
+Analyses are defined in a YAML configuration file (config/analyses.yaml by
+default). Each entry names an input occurrences file, an analysis method and
+a grid resolution; results are written under results/ by the pipeline.
+
+Usage:
+    python generate_map.py --list
+    python generate_map.py --config heteroptera_chao1_100km
+    python generate_map.py --config heteroptera_chao1_100km kaskaat_chao1_100km
+    python generate_map.py --all
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import yaml
+
+# Prefer PyYAML's libyaml C bindings; yaml.safe_load would fall back to the
+# much slower pure-Python loader
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+from helpers.pipeline import process_data
+
+
+DEFAULT_CONFIG_FILE = "config/analyses.yaml"
+
+
+def load_configs(config_file=DEFAULT_CONFIG_FILE):
+    """
+    Load analysis configurations from a YAML file.
+
+    Args:
+        config_file (str): Path to the YAML configuration file
+
+    Returns:
+        dict: Dictionary mapping configuration names to their settings
+
+    Raises:
+        FileNotFoundError: If the configuration file doesn't exist
+        ValueError: If the file contains no analyses
+    """
+    path = Path(config_file)
+    if not path.exists():
+        raise FileNotFoundError(f"Configuration file not found: {config_file}")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.load(f, Loader=YamlLoader)
+
+    analyses = (data or {}).get('analyses') or []
+    if not analyses:
+        raise ValueError(f"No analyses defined in {config_file}")
+
+    configs = {}
+    for analysis in analyses:
+        name = analysis.get('name')
+        if name:
+            configs[name] = analysis
+
+    return configs
+
+
+def validate_config(config, dir_contents=None):
+    """
+    Validate a single analysis configuration.
+
+    Args:
+        config (dict): Configuration with 'input_file', 'method' and
+                       'resolution_km' keys
+        dir_contents (dict, optional): Cache mapping parent directory paths
+                                       to sets of filenames; when provided,
+                                       file existence is checked against the
+                                       cache instead of stat'ing each file
+
+    Returns:
+        tuple: (is_valid, message) where message describes the first problem
+               found, or is empty when the configuration is valid
+    """
+    for key in ('input_file', 'method', 'resolution_km'):
+        if key not in config:
+            return False, f"Missing required key: {key}"
+
+    input_file = Path(config['input_file'])
+    if dir_contents is not None and str(input_file.parent) in dir_contents:
+        exists = input_file.name in dir_contents[str(input_file.parent)]
+    else:
+        exists = input_file.exists()
+    if not exists:
+        return False, f"Input file not found: {config['input_file']}"
+
+    return True, ""
+
+
+def list_configs(configs):
+    """
+    Print available configurations with their validation status.
+
+    Args:
+        configs (dict): Dictionary mapping configuration names to settings
+    """
+    # Configurations typically share input directories, so list each unique
+    # parent directory once instead of stat'ing every input file
+    dir_contents = {}
+    for config in configs.values():
+        input_file = config.get('input_file')
+        if not input_file:
+            continue
+        parent = str(Path(input_file).parent)
+        if parent not in dir_contents:
+            try:
+                dir_contents[parent] = set(os.listdir(parent))
+            except OSError:
+                dir_contents[parent] = set()
+
+    print(f"Available configurations ({len(configs)}):")
+    for name, config in configs.items():
+        is_valid, message = validate_config(config, dir_contents)
+        status = "ok" if is_valid else f"INVALID: {message}"
+        print(f"  {name}: {config.get('method')} @ {config.get('resolution_km')}km [{status}]")
+
+
+def run_config(name, config):
+    """
+    Run a single analysis configuration through the pipeline.
+
+    Args:
+        name (str): Configuration name (used for reporting)
+        config (dict): Configuration settings
+
+    Returns:
+        bool: True if the analysis completed successfully
+    """
+    is_valid, message = validate_config(config)
+    if not is_valid:
+        print(f"Skipping {name}: {message}")
+        return False
+
+    try:
+        process_data(
+            config['input_file'],
+            config['method'],
+            config['resolution_km'],
+        )
+        return True
+    except Exception as e:
+        print(f"Error running {name}: {e}")
+        return False
+
+
+def _run_one(item):
+    """
+    Worker for running one configuration in a separate process.
+
+    Args:
+        item (tuple): (name, config) pair
+
+    Returns:
+        tuple: (name, success) pair
+    """
+    name, config = item
+    return name, run_config(name, config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate analysis maps from occurrence data")
+    parser.add_argument("--config-file", default=DEFAULT_CONFIG_FILE,
+                        help=f"Path to YAML configuration file (default: {DEFAULT_CONFIG_FILE})")
+    parser.add_argument("--list", action="store_true",
+                        help="List available configurations")
+    parser.add_argument("--config", nargs="+", metavar="NAME",
+                        help="Run one or more named configurations")
+    parser.add_argument("--all", action="store_true",
+                        help="Run all configurations")
+    args = parser.parse_args()
+
+    configs = load_configs(args.config_file)
+
+    if args.list:
+        list_configs(configs)
+        return 0
+
+    if args.all:
+        config_names = list(configs.keys())
+    elif args.config:
+        config_names = args.config
+        unknown = [name for name in config_names if name not in configs]
+        if unknown:
+            print(f"Unknown configuration(s): {', '.join(unknown)}")
+            print("Use --list to see available configurations.")
+            return 1
+    else:
+        parser.print_help()
+        return 1
+
+    # Each configuration is an independent pipeline over its own input
+    # file, so run them concurrently with one worker per core
+    work_items = [(name, configs[name]) for name in config_names]
+    if len(work_items) == 1:
+        results = [_run_one(work_items[0])]
+    else:
+        max_workers = min(len(work_items), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_run_one, work_items))
+
+    succeeded = sum(1 for _, success in results if success)
+
+    print(f"Completed {succeeded}/{len(config_names)} analyses.")
+    return 0 if succeeded == len(config_names) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,29 +2,73 @@
 Analysis methods for calculating species diversity metrics.
 """
 
-import random
+import os
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+
+# Single shared random generator; creating one per call wastes time seeding
+# and makes runs harder to reproduce via np.random.default_rng seeding
+_rng = np.random.default_rng()
+
+
+def _flatten_area_records(area_records):
+    """
+    Flatten area_records into parallel integer arrays for vectorized analysis.
+
+    Species names are encoded to integer ids with a single shared mapping,
+    so all per-cell work can run as NumPy operations over flat arrays.
+
+    Args:
+        area_records (dict): Dictionary mapping grid cells to lists of species names
+
+    Returns:
+        tuple: (cell_names, cell_ids, species_ids) where cell_names is a list of
+               grid cell keys, and cell_ids/species_ids are parallel int64 arrays
+               with one entry per occurrence record
+    """
+    cell_names = list(area_records.keys())
+    lengths = [len(species_list) for species_list in area_records.values()]
+    cell_ids = np.repeat(np.arange(len(cell_names), dtype=np.int64), lengths)
+
+    species_to_int = {}
+    species_ids = np.fromiter(
+        (species_to_int.setdefault(name, len(species_to_int))
+         for name in chain.from_iterable(area_records.values())),
+        dtype=np.int64,
+        count=len(cell_ids),
+    )
+
+    return cell_names, cell_ids, species_ids
 
 
 def calculate_speciescount(area_records):
     """
     Calculate species count (richness) for each grid cell.
-    
+
     Args:
         area_records (dict): Dictionary mapping grid cells to lists of species names
                            Example: {"67:34": ["Species A", "Species B", "Species A"], ...}
-    
+
     Returns:
         dict: Dictionary mapping grid cells to species counts
               Example: {"67:34": 2, "68:35": 5, ...}
     """
-    result = {}
-    for grid_cell, species_list in area_records.items():
-        # Count unique species
-        unique_species = set(species_list)
-        result[grid_cell] = len(unique_species)
-    
-    return result
+    if not area_records:
+        return {}
+
+    cell_names, cell_ids, species_ids = _flatten_area_records(area_records)
+
+    # Pack (cell, species) pairs into single int64 keys and deduplicate in C,
+    # then count unique species per cell with bincount
+    keys = (cell_ids << 32) | species_ids
+    unique_keys = np.unique(keys)
+    counts = np.bincount(unique_keys >> 32, minlength=len(cell_names))
+
+    return {cell_names[i]: int(counts[i]) for i in range(len(cell_names))}
 
 
 def build_accumulation_curve(species_list, n_iterations=1000):
@@ -41,35 +85,39 @@ def build_accumulation_curve(species_list, n_iterations=1000):
     """
     if not species_list:
         return []
-    
+
     n_records = len(species_list)
-    accumulation_curves = []
-    
-    for _ in range(n_iterations):
-        # Shuffle the list randomly
-        shuffled = species_list.copy()
-        random.shuffle(shuffled)
-        
-        # Track unique species as we go through records
-        seen_species = set()
-        curve = []
-        
-        for species in shuffled:
-            seen_species.add(species)
-            curve.append(len(seen_species))
-        
-        accumulation_curves.append(curve)
-    
+
+    # Encode species names to integer ids once so the per-iteration work
+    # runs on flat integer arrays instead of hashing strings into sets
+    species_to_int = {}
+    ids = np.fromiter(
+        (species_to_int.setdefault(name, len(species_to_int)) for name in species_list),
+        dtype=np.int64,
+        count=n_records,
+    )
+
+    # Generate shuffled orderings in vectorized batches; batching caps the
+    # permutation-matrix memory at batch_size * n_records instead of
+    # n_iterations * n_records
+    batch_size = 64
+    curve_sum = np.zeros(n_records, dtype=np.float64)
+
+    for start in range(0, n_iterations, batch_size):
+        n_batch = min(batch_size, n_iterations - start)
+        permutations = _rng.permuted(
+            np.broadcast_to(ids, (n_batch, n_records)), axis=1
+        )
+        for shuffled in permutations:
+            # Mark the first occurrence of each species in the shuffled
+            # order; the running unique count is then a cumulative sum
+            is_first = np.zeros(n_records, dtype=np.int64)
+            _, first_indices = np.unique(shuffled, return_index=True)
+            is_first[first_indices] = 1
+            curve_sum += np.cumsum(is_first)
+
     # Average across all iterations
-    if not accumulation_curves:
-        return []
-    
-    averaged_curve = []
-    for i in range(n_records):
-        step_values = [curve[i] for curve in accumulation_curves]
-        averaged_curve.append(sum(step_values) / len(step_values))
-    
-    return averaged_curve
+    return (curve_sum / n_iterations).tolist()
 
 
 def calculate_chao1_estimator(species_counts):
@@ -83,25 +131,39 @@ def calculate_chao1_estimator(species_counts):
         F2 = number of doubletons (species seen twice)
     
     Args:
-        species_counts (dict or Counter): Dictionary mapping species to their counts
-    
+        species_counts (dict, Counter or np.ndarray): Dictionary mapping species
+                       to their counts, or an array of per-species counts
+
     Returns:
         float: Estimated total species richness
     """
+    # Fast path: an array of per-species counts gets its frequency-of-
+    # frequencies histogram in one bincount pass
+    if isinstance(species_counts, np.ndarray):
+        present = species_counts[species_counts > 0]
+        if present.size == 0:
+            return 0.0
+        freq_of_freq = np.bincount(present)
+        S_obs = int(present.size)
+        F1 = int(freq_of_freq[1]) if len(freq_of_freq) > 1 else 0
+        F2 = int(freq_of_freq[2]) if len(freq_of_freq) > 2 else 0
+        return S_obs + (F1 * (F1 - 1)) / (2.0 * (F2 + 1))
+
     if not species_counts:
         return 0.0
-    
+
     # Convert to Counter if needed
     if isinstance(species_counts, dict):
         counts = Counter(species_counts)
     else:
         counts = species_counts
-    
+
     S_obs = len(counts)  # Observed species richness
-    
-    # Count singletons and doubletons
-    F1 = sum(1 for count in counts.values() if count == 1)
-    F2 = sum(1 for count in counts.values() if count == 2)
+
+    # Count singletons and doubletons in a single pass over the counts
+    count_of_counts = Counter(counts.values())
+    F1 = count_of_counts.get(1, 0)
+    F2 = count_of_counts.get(2, 0)
     
     # Bias-corrected Chao1 formula (Colwell & Coddington, 1994)
     # S_chao1 = S_obs + (F1 * (F1 - 1)) / (2 * (F2 + 1))
@@ -111,6 +173,25 @@ def calculate_chao1_estimator(species_counts):
     return chao1
 
 
+@lru_cache(maxsize=4096)
+def _chao1_from_spectrum(S_obs, F1, F2):
+    """
+    Bias-corrected Chao1 estimate from a (S_obs, F1, F2) frequency spectrum.
+
+    Memoized because real datasets contain many cells with identical
+    spectra (e.g. lots of single-record cells).
+
+    Args:
+        S_obs (int): Observed species richness
+        F1 (int): Number of singletons
+        F2 (int): Number of doubletons
+
+    Returns:
+        float: Estimated total species richness
+    """
+    return S_obs + (F1 * (F1 - 1)) / (2.0 * (F2 + 1))
+
+
 def calculate_incompleteness(area_species_list):
     """
     Calculate inventory incompleteness for an area using Chao1 estimator.
@@ -125,22 +206,42 @@ def calculate_incompleteness(area_species_list):
     if not area_species_list:
         return 1.0
     
-    # Count species occurrences
-    species_counts = Counter(area_species_list)
-    
-    # Observed richness
+    return calculate_incompleteness_from_counts(Counter(area_species_list))
+
+
+def calculate_incompleteness_from_counts(species_counts):
+    """
+    Calculate inventory incompleteness from precomputed species counts.
+
+    Callers that already hold a Counter for a cell can use this directly
+    and skip the recount done by calculate_incompleteness.
+
+    Args:
+        species_counts (dict or Counter): Dictionary mapping species to their counts
+
+    Returns:
+        float: Incompleteness ratio (0.0+), where 0.0 means fully sampled,
+               higher values mean more species remain undiscovered
+    """
+    if not species_counts:
+        return 1.0
+
+    # Observed richness and frequency spectrum
     S_obs = len(species_counts)
-    
-    # Estimated richness using Chao1
-    S_est = calculate_chao1_estimator(species_counts)
-    
+    count_of_counts = Counter(species_counts.values())
+
+    # Estimated richness using (memoized) Chao1
+    S_est = _chao1_from_spectrum(
+        S_obs, count_of_counts.get(1, 0), count_of_counts.get(2, 0)
+    )
+
     if S_est == 0:
         return 1.0
-    
+
     # Incompleteness = 1 - (Observed / Estimated)
     completeness = S_obs / S_est
     incompleteness = max(0.0, 1.0 - completeness)
-    
+
     return incompleteness
 
 
@@ -188,36 +289,179 @@ def calculate_chao1(area_records):
               higher = more species likely remain undiscovered)
               Example: {"67:34": 0.15, "68:35": 0.08, ...}
     """
-    result = {}
-    for grid_cell, species_list in area_records.items():
-        incompleteness = calculate_incompleteness(species_list)
-        result[grid_cell] = incompleteness
-    
-    return result
+    if not area_records:
+        return {}
+
+    cell_names, cell_ids, species_ids = _flatten_area_records(area_records)
+    n_cells = len(cell_names)
+
+    # Per-(cell, species) occurrence counts from one pass over the flat arrays
+    keys = (cell_ids << 32) | species_ids
+    unique_keys, pair_counts = np.unique(keys, return_counts=True)
+    pair_cells = unique_keys >> 32
+
+    # Per-cell observed richness, singletons and doubletons
+    S_obs = np.bincount(pair_cells, minlength=n_cells).astype(np.float64)
+    F1 = np.bincount(pair_cells, weights=(pair_counts == 1), minlength=n_cells)
+    F2 = np.bincount(pair_cells, weights=(pair_counts == 2), minlength=n_cells)
+
+    # Bias-corrected Chao1 formula (Colwell & Coddington, 1994), vectorized
+    S_est = S_obs + (F1 * (F1 - 1)) / (2.0 * (F2 + 1))
+
+    # Incompleteness = 1 - (Observed / Estimated); empty cells count as 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        incompleteness = np.where(
+            S_est > 0, np.maximum(0.0, 1.0 - S_obs / S_est), 1.0
+        )
+
+    return {cell_names[i]: float(incompleteness[i]) for i in range(n_cells)}
+
+
+def analytic_accumulation_curve(species_list):
+    """
+    Compute the exact expected species accumulation curve.
 
+    Under random sampling without replacement, the expected number of
+    species after m records has the closed form
+        S_m = sum_k F_k * (1 - C(M - k, m) / C(M, m))
+    where M is the total record count and F_k the number of species with
+    abundance k. This gives the same statistic as Monte-Carlo rarefaction
+    with no randomness and no iterations.
 
-def calculate_accumulation_curve(area_records):
+    Args:
+        species_list (list): List of species names (with duplicates)
+
+    Returns:
+        list: Expected number of unique species at each step
+    """
+    if not species_list:
+        return []
+
+    counts = np.asarray(list(Counter(species_list).values()), dtype=np.int64)
+    return _analytic_curve_from_counts(counts).tolist()
+
+
+def _analytic_curve_from_counts(counts, sample_points=None):
+    """
+    Core of analytic_accumulation_curve operating on an abundance array.
+
+    Args:
+        counts (np.ndarray): Per-species abundances for one grid cell
+        sample_points (np.ndarray, optional): Sample sizes m at which to
+                       evaluate the curve; defaults to every step 1..M
+
+    Returns:
+        np.ndarray: Expected number of unique species at each sample point
+    """
+    M = int(counts.sum())
+
+    # Group species by abundance: the curve depends only on the frequency
+    # spectrum, so sum over unique abundances weighted by F_k
+    abundances, spectrum = np.unique(counts, return_counts=True)
+
+    # Log-factorial table for stable binomial-coefficient ratios
+    log_factorial = np.concatenate(
+        ([0.0], np.cumsum(np.log(np.arange(1, M + 1, dtype=np.float64))))
+    )
+
+    m = np.arange(1, M + 1) if sample_points is None else sample_points
+    log_total = log_factorial[M] - log_factorial[m] - log_factorial[M - m]
+
+    # P(species with abundance k missing from a sample of m) = C(M-k, m) / C(M, m)
+    remaining = (M - abundances)[:, np.newaxis]
+    valid = m <= remaining
+    log_miss = np.where(
+        valid,
+        log_factorial[remaining]
+        - log_factorial[m]
+        - log_factorial[np.maximum(remaining - m, 0)],
+        -np.inf,
+    )
+    p_miss = np.exp(log_miss - log_total)
+
+    expected_species = (spectrum[:, np.newaxis] * (1.0 - p_miss)).sum(axis=0)
+    return expected_species
+
+
+@lru_cache(maxsize=4096)
+def _slope_from_spectrum(spectrum):
+    """
+    Accumulation-curve slope for an abundance spectrum.
+
+    The analytic curve depends only on the abundance spectrum, not on
+    species identities, so cells sharing a spectrum (very common for
+    sparse cells, e.g. (1,), (1, 1) or (2, 1)) share the cached slope.
+
+    Args:
+        spectrum (tuple): Sorted per-species abundances for one grid cell
+
+    Returns:
+        float: Slope value (species per record)
+    """
+    counts = np.asarray(spectrum, dtype=np.int64)
+    M = int(counts.sum())
+
+    # The slope only looks at the curve's final ~10 steps, so evaluate the
+    # expectation just at those sample sizes instead of all m in 1..M
+    tail_points = np.arange(max(1, M - 10), M + 1)
+    curve = _analytic_curve_from_counts(counts, sample_points=tail_points)
+    return calculate_accumulation_slope(curve.tolist())
+
+
+def _cell_accumulation_slope(species_list):
+    """
+    Worker for calculate_accumulation_curve: build the rarefaction curve
+    for one grid cell and return its final slope.
+
+    Args:
+        species_list (list): List of species names (with duplicates)
+
+    Returns:
+        float: Slope value (species per record)
+    """
+    counts = Counter(species_list)
+    if len(counts) <= 1:
+        # Zero or one species: the curve is flat, so the slope is zero
+        return 0.0
+
+    return _slope_from_spectrum(tuple(sorted(counts.values())))
+
+
+def calculate_accumulation_curve(area_records, n_jobs=None):
     """
     Calculate accumulation curve slope for each grid cell.
-    
+
     Args:
         area_records (dict): Dictionary mapping grid cells to lists of species names
                            Example: {"67:34": ["Species A", "Species B", "Species A"], ...}
-    
+        n_jobs (int, optional): Number of worker processes for large inputs.
+                              Defaults to the CPU count.
+
     Returns:
         dict: Dictionary mapping grid cells to slope values
               Example: {"67:34": 0.05, "68:35": 0.12, ...}
     """
-    result = {}
-    for grid_cell, species_list in area_records.items():
-        # Build accumulation curve with 1000 iterations for rarefaction
-        accumulation_curve = build_accumulation_curve(species_list, n_iterations=1000)
-        
-        # Calculate the final slope of the accumulation curve
-        slope = calculate_accumulation_slope(accumulation_curve)
-        result[grid_cell] = slope
-    
-    return result
+    if not area_records:
+        return {}
+
+    grid_cells = list(area_records.keys())
+    species_lists = list(area_records.values())
+
+    # Small inputs run in-process: worker startup would dominate, and the
+    # in-process path keeps all hits in one _slope_from_spectrum cache.
+    # It also avoids nested pools when a batch driver already runs each
+    # dataset in its own worker process.
+    if len(grid_cells) <= 4:
+        slopes = [_cell_accumulation_slope(species_list) for species_list in species_lists]
+        return dict(zip(grid_cells, slopes))
+
+    # Each cell's rarefaction is independent, so spread the cells across
+    # worker processes; map preserves the input order
+    max_workers = min(len(grid_cells), n_jobs or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        slopes = list(executor.map(_cell_accumulation_slope, species_lists))
+
+    return dict(zip(grid_cells, slopes))
 
 
 # Method registry for easy lookup
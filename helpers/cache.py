@@ -0,0 +1,74 @@
+"""
+Simple on-disk caching for expensive pipeline intermediates.
+
+Grouped occurrence data depends only on the input file and the grid
+resolution, so repeated runs (e.g. after tweaking colors or methods) can
+skip parsing and grouping entirely. Cache entries are pickles under
+.cache/, keyed by the input file's path, mtime and size plus the
+resolution, so a changed input file automatically misses.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+
+CACHE_DIR = Path(".cache")
+
+
+def _cache_path(input_file, resolution_km):
+    """
+    Build the cache file path for an (input file, resolution) pair.
+
+    Args:
+        input_file (str): Path to the input occurrences file
+        resolution_km (int): Grid resolution in kilometers
+
+    Returns:
+        Path: Path to the cache pickle for this combination
+    """
+    stat = os.stat(input_file)
+    key = f"{input_file}:{stat.st_mtime_ns}:{stat.st_size}:{resolution_km}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"area_records_{digest}.pickle"
+
+
+def load_cached_area_records(input_file, resolution_km):
+    """
+    Load grouped occurrence data from the cache, if present.
+
+    Args:
+        input_file (str): Path to the input occurrences file
+        resolution_km (int): Grid resolution in kilometers
+
+    Returns:
+        dict or None: Cached area_records, or None on a cache miss
+    """
+    try:
+        cache_file = _cache_path(input_file, resolution_km)
+        if not cache_file.exists():
+            return None
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # A broken cache entry is treated as a miss
+        return None
+
+
+def save_cached_area_records(input_file, resolution_km, area_records):
+    """
+    Store grouped occurrence data in the cache.
+
+    Args:
+        input_file (str): Path to the input occurrences file
+        resolution_km (int): Grid resolution in kilometers
+        area_records (dict): Grouped occurrence data to cache
+    """
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file = _cache_path(input_file, resolution_km)
+        with open(cache_file, "wb") as f:
+            pickle.dump(area_records, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # Caching is best-effort; never fail the pipeline over it
+        pass
@@ -2,6 +2,8 @@
 Color utility functions for generating color ramps.
 """
 
+import numpy as np
+
 
 def hex_color_ramp(value, min_val, max_val):
     """
@@ -39,35 +41,44 @@ def hex_color_ramp(value, min_val, max_val):
         g = int(255 * (1 - (normalized - 0.67) / 0.33))
         b = 0
     
-    return f"#{r:02x}{g:02x}{b:02x}"
+    # Single C call producing all six zero-padded lowercase hex digits
+    return '#' + bytes((r, g, b)).hex()
+
+
+# Precomputed hex colors for 256 evenly spaced points along the ramp, so
+# batch coloring is a single LUT gather instead of a per-cell Python call
+_HEX_LUT = np.array([hex_color_ramp(i, 0, 255) for i in range(256)])
 
 
 def add_colors_to_values(values_dict):
     """
     Add color mapping to a dictionary of grid cell values.
-    
+
     Args:
         values_dict (dict): Dictionary mapping grid cells to numeric values
                           Example: {"67:34": 0.85, "68:35": 0.92}
-    
+
     Returns:
         dict: Dictionary with color and value for each grid cell
               Example: {"67:34": {"color": "#ff0000", "value": 0.85}, ...}
     """
     if not values_dict:
         return {}
-    
-    values = list(values_dict.values())
-    min_val = min(values)
-    max_val = max(values)
-    
-    result = {}
-    for grid_cell, value in values_dict.items():
-        color = hex_color_ramp(value, min_val, max_val)
-        result[grid_cell] = {
-            "color": color,
-            "value": value
-        }
-    
-    return result
+
+    values = np.fromiter(values_dict.values(), dtype=np.float64, count=len(values_dict))
+    min_val = values.min()
+    max_val = values.max()
+
+    if max_val == min_val:
+        # Default to blue if all values are the same
+        colors = ["#0000ff"] * len(values)
+    else:
+        # Normalize to 0-255 and gather all colors from the LUT at once
+        indices = ((values - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+        colors = _HEX_LUT[indices]
+
+    return {
+        grid_cell: {"color": str(color), "value": value}
+        for (grid_cell, value), color in zip(values_dict.items(), colors)
+    }
 
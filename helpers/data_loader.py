@@ -2,58 +2,117 @@
 Data loading utilities for reading occurrence data files.
 """
 
-import csv
 from collections import defaultdict
 
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.compute as pc
+
 
 def load_occurrences(input_file):
     """
     Load occurrence data from a tab-separated file.
-    
+
     The file format has 3 header rows:
     1. DwC field names (used as column names)
     2. Finnish names (skipped)
     3. English names (skipped)
-    
+
     Args:
         input_file (str): Path to the occurrences.txt file
-    
+
     Returns:
         list: List of dictionaries, each containing 'gridCellYKJ' and 'scientificName'
     """
-    records = []
-    
+    grid_cells, scientific_names = _read_occurrence_columns(input_file)
+
+    return [
+        {'gridCellYKJ': grid_cell, 'scientificName': scientific_name}
+        for grid_cell, scientific_name in zip(grid_cells, scientific_names)
+    ]
+
+
+def _read_occurrence_columns(input_file):
+    """
+    Read the grid cell and scientific name columns from an occurrences file.
+
+    Args:
+        input_file (str): Path to the occurrences.txt file
+
+    Returns:
+        tuple: (grid_cells, scientific_names) - parallel lists of strings,
+               with rows missing either value already dropped
+    """
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            # Read first line (DwC field names) to get column names
-            first_line = f.readline().strip()
-            fieldnames = first_line.split('\t')
-            
-            # Skip the next 2 header rows (Finnish and English)
-            f.readline()  # Skip Finnish header
-            f.readline()  # Skip English header
-            
-            # Now create reader with the fieldnames we extracted
-            reader = csv.DictReader(f, fieldnames=fieldnames, delimiter='\t')
-            
-            # Process each row
-            for row in reader:
-                grid_cell = row.get('gridCellYKJ', '').strip()
-                scientific_name = row.get('scientificName', '').strip()
-                
-                # Skip rows without grid cell or scientific name
-                if grid_cell and scientific_name:
-                    records.append({
-                        'gridCellYKJ': grid_cell,
-                        'scientificName': scientific_name
-                    })
-    
+        # Parse with pyarrow's native CSV reader, projecting just the two
+        # needed columns instead of tokenizing every DwC field per row
+        table = pa.csv.read_csv(
+            input_file,
+            read_options=pa.csv.ReadOptions(skip_rows_after_names=2),
+            parse_options=pa.csv.ParseOptions(delimiter='\t'),
+            convert_options=pa.csv.ConvertOptions(
+                include_columns=['gridCellYKJ', 'scientificName'],
+                column_types={
+                    'gridCellYKJ': pa.string(),
+                    'scientificName': pa.string(),
+                },
+            ),
+        )
+
+        grid_cells = pc.utf8_trim_whitespace(table['gridCellYKJ'])
+        scientific_names = pc.utf8_trim_whitespace(table['scientificName'])
+
+        # Skip rows without grid cell or scientific name
+        valid = pc.and_(
+            pc.greater(pc.utf8_length(grid_cells), 0),
+            pc.greater(pc.utf8_length(scientific_names), 0),
+        )
+        grid_cells = pc.filter(grid_cells, valid)
+        scientific_names = pc.filter(scientific_names, valid)
+
+        return grid_cells.to_pylist(), scientific_names.to_pylist()
+
     except FileNotFoundError:
         raise FileNotFoundError(f"Input file not found: {input_file}")
     except Exception as e:
         raise RuntimeError(f"Error reading input file {input_file}: {e}")
-    
-    return records
+
+
+def load_and_group(input_file, resolution_km):
+    """
+    Load occurrence data and group it by grid cell in a single pass.
+
+    Fuses load_occurrences and group_by_grid_cell so no intermediate
+    per-record dictionaries are materialized.
+
+    Args:
+        input_file (str): Path to the occurrences.txt file
+        resolution_km (int): Target resolution in kilometers (1, 10, or 100)
+
+    Returns:
+        tuple: (area_records, record_count) where area_records maps grid
+               cells to lists of species names and record_count is the
+               number of loaded occurrence records
+    """
+    from helpers.grid_utils import convert_to_resolution
+
+    grid_cells, scientific_names = _read_occurrence_columns(input_file)
+
+    area_records = defaultdict(list)
+    conversion_cache = {}
+
+    for grid_cell, scientific_name in zip(grid_cells, scientific_names):
+        if grid_cell in conversion_cache:
+            converted_grid_cell = conversion_cache[grid_cell]
+        else:
+            converted_grid_cell = convert_to_resolution(grid_cell, resolution_km)
+            conversion_cache[grid_cell] = converted_grid_cell
+        if converted_grid_cell is None:
+            continue
+
+        area_records[converted_grid_cell].append(scientific_name)
+
+    return dict(area_records), len(grid_cells)
 
 
 def group_by_grid_cell(records, resolution_km):
@@ -69,20 +128,28 @@ def group_by_grid_cell(records, resolution_km):
               Example: {"67:34": ["Species A", "Species B", "Species A", ...], ...}
     """
     from helpers.grid_utils import convert_to_resolution
-    
+
     area_records = defaultdict(list)
-    
+
+    # Grid cell strings repeat heavily across records, so parse each unique
+    # cell once and reuse the converted value
+    conversion_cache = {}
+
     for record in records:
         grid_cell = record['gridCellYKJ']
         scientific_name = record['scientificName']
-        
+
         # Convert to target resolution
-        converted_grid_cell = convert_to_resolution(grid_cell, resolution_km)
+        if grid_cell in conversion_cache:
+            converted_grid_cell = conversion_cache[grid_cell]
+        else:
+            converted_grid_cell = convert_to_resolution(grid_cell, resolution_km)
+            conversion_cache[grid_cell] = converted_grid_cell
         if converted_grid_cell is None:
             continue
-        
+
         # Add species record to this area
         area_records[converted_grid_cell].append(scientific_name)
-    
+
     return dict(area_records)
 
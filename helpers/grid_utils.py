@@ -2,7 +2,10 @@
 Grid cell conversion utilities for different resolutions.
 """
 
+from functools import lru_cache
 
+
+@lru_cache(maxsize=1 << 16)
 def convert_to_resolution(grid_cell, target_resolution_km):
     """
     Convert a grid cell coordinate to the specified resolution.
@@ -16,50 +19,44 @@ def convert_to_resolution(grid_cell, target_resolution_km):
     """
     try:
         northing_str, easting_str = grid_cell.split(':')
-        
-        # Determine number of digits needed for target resolution
-        if target_resolution_km == 1:
-            digits_needed = 4
-        elif target_resolution_km == 10:
-            digits_needed = 3
-        elif target_resolution_km == 50:
-            digits_needed = 3
-        elif target_resolution_km == 100:
-            digits_needed = 2
-        else:
-            return None
-        
-        # Convert to integers and truncate to desired number of digits
-        northing = int(northing_str)
-        easting = int(easting_str)
-        
-        # Calculate divisor based on current number of digits and target
-        # If input has more digits than needed, truncate from the right
-        current_northing_digits = len(northing_str)
-        current_easting_digits = len(easting_str)
-        
-        if current_northing_digits > digits_needed:
-            divisor = 10 ** (current_northing_digits - digits_needed)
-            northing = northing // divisor
-        elif current_northing_digits < digits_needed:
-            # Pad with zeros if input has fewer digits (shouldn't happen normally)
-            northing = northing * (10 ** (digits_needed - current_northing_digits))
-        
-        if current_easting_digits > digits_needed:
-            divisor = 10 ** (current_easting_digits - digits_needed)
-            easting = easting // divisor
-        elif current_easting_digits < digits_needed:
-            # Pad with zeros if input has fewer digits (shouldn't happen normally)
-            easting = easting * (10 ** (digits_needed - current_easting_digits))
-        
-        # For 50 km resolution, round down so last digit is 0 or 5
-        if target_resolution_km == 50:
-            northing = (northing // 5) * 5
-            easting = (easting // 5) * 5
-        
-        # Format with leading zeros if needed to match exact digit count
-        return f"{northing:0{digits_needed}d}:{easting:0{digits_needed}d}"
-    
     except (ValueError, AttributeError):
         return None
 
+    # isdecimal (unlike isdigit) accepts exactly the characters int() can
+    # parse, so digit forms like superscripts fail here instead of raising
+    # in the int conversions below
+    if not (northing_str.isdecimal() and easting_str.isdecimal()):
+        return None
+
+    # Determine number of digits needed for target resolution
+    if target_resolution_km == 1:
+        digits_needed = 4
+    elif target_resolution_km == 10:
+        digits_needed = 3
+    elif target_resolution_km == 50:
+        digits_needed = 3
+    elif target_resolution_km == 100:
+        digits_needed = 2
+    else:
+        return None
+
+    # Fast path: input already at the target digit count, nothing to do
+    # (except for 50 km, which still needs the round-to-5 below)
+    if (target_resolution_km != 50
+            and len(northing_str) == digits_needed
+            and len(easting_str) == digits_needed):
+        return grid_cell
+
+    # Truncating decimal digits from the right and zero-padding short
+    # inputs are both plain string operations; no int round-trip needed
+    northing_str = northing_str[:digits_needed].ljust(digits_needed, '0')
+    easting_str = easting_str[:digits_needed].ljust(digits_needed, '0')
+
+    # For 50 km resolution, round down so last digit is 0 or 5
+    if target_resolution_km == 50:
+        northing = (int(northing_str) // 5) * 5
+        easting = (int(easting_str) // 5) * 5
+        return f"{northing:0{digits_needed}d}:{easting:0{digits_needed}d}"
+
+    return f"{northing_str}:{easting_str}"
+
@@ -2,11 +2,11 @@
 Pipeline orchestrator for processing occurrence data and generating maps.
 """
 
-import json
-import os
+import orjson
 from pathlib import Path
 
-from helpers.data_loader import load_occurrences, group_by_grid_cell
+from helpers.cache import load_cached_area_records, save_cached_area_records
+from helpers.data_loader import load_and_group
 from helpers.analysis_methods import get_method
 from helpers.color_utils import add_colors_to_values
 from helpers.simplemap import create_finland_map
@@ -90,15 +90,18 @@ def process_data(input_file, method, resolution_km, output_base="results"):
     print(f"  Resolution: {resolution_km}km")
     print(f"  Input: {input_file}")
     
-    # Step 1: Load occurrence data
-    print("  Loading occurrence data...")
-    records = load_occurrences(input_file)
-    print(f"  Loaded {len(records)} occurrence records")
-    
-    # Step 2: Group by grid cells at target resolution
-    print(f"  Grouping by {resolution_km}km grid cells...")
-    area_records = group_by_grid_cell(records, resolution_km)
-    print(f"  Found {len(area_records)} grid cells with data")
+    # Steps 1-2: Load occurrence data and group by grid cells, reusing the
+    # on-disk cache when the same input/resolution was processed before
+    area_records = load_cached_area_records(input_file, resolution_km)
+    if area_records is not None:
+        print(f"  Using cached {resolution_km}km grid cells ({len(area_records)} cells)")
+    else:
+        print(f"  Loading and grouping by {resolution_km}km grid cells...")
+        area_records, record_count = load_and_group(input_file, resolution_km)
+        print(f"  Loaded {record_count} occurrence records")
+        print(f"  Found {len(area_records)} grid cells with data")
+
+        save_cached_area_records(input_file, resolution_km, area_records)
     
     if not area_records:
         raise ValueError("No valid grid cells found after grouping.")
@@ -115,10 +118,11 @@ def process_data(input_file, method, resolution_km, output_base="results"):
     print("  Adding color mapping...")
     data_with_colors = add_colors_to_values(values_dict)
     
-    # Step 5: Save JSON data file
+    # Step 5: Save JSON data file (compact orjson output; pretty-printing
+    # roughly doubles file size and write time)
     print(f"  Saving JSON data to {json_path}...")
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data_with_colors, f, indent=2, ensure_ascii=False)
+    with open(json_path, 'wb') as f:
+        f.write(orjson.dumps(data_with_colors))
     
     # Step 6: Generate map
     print(f"  Generating map to {map_path}...")
@@ -14,10 +14,106 @@ The grid size is determined by the number of digits in each coordinate:
 Each square is rendered as a rectangle with the appropriate size and specified color.
 """
 
-import json
 import os
+from functools import lru_cache
+
+import orjson
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Fixed raster backend; output is always PNG
+# The border GeoJSON carries far more vertices than the output raster can
+# show; let Agg drop sub-pixel segments while stroking the border lines
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle, Patch
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import ListedColormap, to_rgba_array
+from matplotlib.patches import Patch
+
+# Default borders file shipped next to this module, resolved once at import
+_DEFAULT_BORDERS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "finland_borders.geojson"
+)
+
+# Figures reused across renders, keyed by figsize; constructing a Figure
+# (backend state, font caches) is expensive compared to clearing the axes
+_figure_cache = {}
+
+
+def _get_figure(figsize):
+    """
+    Get a cached Figure/Axes pair for the given size, clearing the axes.
+
+    Args:
+        figsize (tuple): Figure size in inches
+
+    Returns:
+        tuple: (fig, ax)
+    """
+    cached = _figure_cache.get(figsize)
+    if cached is None:
+        fig, ax = plt.subplots(figsize=figsize, facecolor='white')
+        _figure_cache[figsize] = (fig, ax)
+    else:
+        fig, ax = cached
+        ax.cla()
+    return fig, ax
+
+
+def close_figures():
+    """
+    Close all cached figures, freeing their memory after a batch run.
+    """
+    for fig, _ in _figure_cache.values():
+        plt.close(fig)
+    _figure_cache.clear()
+
+
+@lru_cache(maxsize=4)
+def _load_borders(borders_file):
+    """
+    Load and parse the borders GeoJSON into per-polygon coordinate arrays.
+
+    Cached at module scope so batch runs rendering many maps parse the
+    borders file once instead of re-reading it per map.
+
+    Args:
+        borders_file (str): Path to the borders GeoJSON file
+
+    Returns:
+        list or None: List of (N, 2) float arrays, one per border polygon,
+                      or None if the file can't be loaded
+    """
+    try:
+        # orjson decodes the coordinate-heavy GeoJSON several times faster
+        # than stdlib json
+        with open(borders_file, 'rb') as f:
+            geojson_data = orjson.loads(f.read())
+    except FileNotFoundError:
+        print(f"Error: Borders file not found: {borders_file}")
+        return None
+    except orjson.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in borders file: {e}")
+        return None
+
+    # Extract coordinates from the MultiPolygon
+    features = geojson_data.get('features', [])
+    if not features:
+        print("Error: No features found in GeoJSON")
+        return None
+
+    geometry = features[0].get('geometry', {})
+    if geometry.get('type') != 'MultiPolygon':
+        print(f"Error: Unexpected geometry type: {geometry.get('type')}")
+        return None
+
+    polylines = []
+    for polygon_group in geometry['coordinates']:
+        for polygon in polygon_group:
+            polylines.append(np.asarray(polygon, dtype=np.float64))
+
+    return polylines
 
 
 def create_finland_map(squares_data, output_file, borders_file=None, figsize=(12, 16), dpi=150, resolution_km=None):
@@ -44,187 +140,242 @@ def create_finland_map(squares_data, output_file, borders_file=None, figsize=(12
     Returns:
         bool: True if the map was created successfully, False otherwise.
     """
+    # Nothing to draw: skip the border load and figure work entirely
+    if not squares_data:
+        print("Warning: No squares data provided. Skipping map generation.")
+        return False
+
     # Set default borders file path if not provided
     if borders_file is None:
-        # Get the directory where this module is located
-        module_dir = os.path.dirname(os.path.abspath(__file__))
-        borders_file = os.path.join(module_dir, "finland_borders.geojson")
-    
-    # Read the GeoJSON file
-    try:
-        with open(borders_file, 'r') as f:
-            geojson_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Borders file not found: {borders_file}")
-        return False
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in borders file: {e}")
-        return False
-    
-    # Extract coordinates from the MultiPolygon
-    features = geojson_data.get('features', [])
-    if not features:
-        print("Error: No features found in GeoJSON")
-        return False
+        borders_file = _DEFAULT_BORDERS_FILE
     
-    geometry = features[0].get('geometry', {})
-    if geometry.get('type') != 'MultiPolygon':
-        print(f"Error: Unexpected geometry type: {geometry.get('type')}")
+    # Read the GeoJSON file (parsed once and cached across renders)
+    border_polylines = _load_borders(borders_file)
+    if border_polylines is None:
         return False
-    
-    multipolygon = geometry['coordinates']
-    
-    # Create figure with white background
-    fig, ax = plt.subplots(figsize=figsize, facecolor='white')
+
+    # Border bounding box, used both to cull off-map squares and to fix
+    # the final extent without a tight-bbox measuring pass
+    border_x = np.concatenate([polyline[:, 0] for polyline in border_polylines])
+    border_y = np.concatenate([polyline[:, 1] for polyline in border_polylines])
+    bx_min, bx_max = border_x.min(), border_x.max()
+    by_min, by_max = border_y.min(), border_y.max()
+
+    # Get a (possibly reused) figure with white background
+    fig, ax = _get_figure(figsize)
     ax.set_facecolor('white')
-    
-    # Plot each polygon in the MultiPolygon
-    for polygon_group in multipolygon:
-        for polygon in polygon_group:
-            # Extract x and y coordinates
-            coords = list(zip(*polygon))
-            x_coords = coords[0]
-            y_coords = coords[1]
-            
-            # Plot the polygon border
-            ax.plot(x_coords, y_coords, 'k-', linewidth=0.5)
+
+    # Draw all polygon borders as a single collection instead of one
+    # Line2D artist per polygon; zorder=2 keeps them sharply on top of the
+    # rasterized square overlay below
+    borders = LineCollection(border_polylines, colors='black', linewidths=0.5,
+                             zorder=2)
+    ax.add_collection(borders)
     
     # Collect unique color-value pairs for the legend
     legend_items = {}  # Dictionary to store unique color-value pairs
-    
-    # Add colored squares
+
+    # First pass: validate the per-cell data dicts and collect keys and
+    # colors; the numeric key parsing itself is vectorized below
+    square_keys = []
+    square_colors = []
+
     for square_key, data in squares_data.items():
         # Extract color and value from the data dictionary
         if not isinstance(data, dict):
             print(f"Warning: Invalid data format for {square_key}. Expected dict with 'color' and 'value' keys.")
             continue
-        
+
         color = data.get('color')
         value = data.get('value')  # Extract value (not used for rendering, but available)
-        
+
         if color is None:
             print(f"Warning: Missing 'color' key for {square_key}. Skipping.")
             continue
-        
+
         # Store unique color-value pairs for legend
         # Use color as key, and keep track of values (in case same color has different values)
         if color not in legend_items:
             legend_items[color] = value
         # If same color has different values, we'll use the first one encountered
-        # Parse the key (e.g., "668:338", "67:34", "6789:3458")
-        try:
-            northing_str, easting_str = square_key.split(':')
-            
-            # Determine grid size based on number of digits
-            # 2 digits = 100km, 3 digits = 10km, 4 digits = 1km
-            northing_digits = len(northing_str)
-            easting_digits = len(easting_str)
-            
-            # Validate that both coordinates have the same number of digits
-            if northing_digits != easting_digits:
-                print(f"Warning: Mismatched coordinate digits in {square_key}. Expected same number of digits.")
-                continue
-            
-            # Determine multiplier and square size based on digit count (and resolution_km for 50km)
-            if northing_digits == 2:
-                # 100km squares: "67:34" -> multiply by 100000
-                multiplier = 100000
-                square_size = 100000
-            elif northing_digits == 3:
-                if resolution_km == 50:
-                    # 50km squares: "670:345" -> multiply by 10000, size is 50000
-                    multiplier = 10000
-                    square_size = 50000
-                else:
-                    # 10km squares: "668:338" -> multiply by 10000
-                    multiplier = 10000
-                    square_size = 10000
-            elif northing_digits == 4:
-                # 1km squares: "6789:3458" -> multiply by 1000
-                multiplier = 1000
-                square_size = 1000
-            else:
-                print(f"Warning: Unsupported coordinate format: {square_key}. Expected 2, 3, or 4 digits per coordinate.")
-                continue
-            
-            northing = int(northing_str) * multiplier
-            easting = int(easting_str) * multiplier
-        except ValueError:
-            print(f"Warning: Invalid square key format: {square_key}. Expected 'northing:easting'")
-            continue
-        
-        # Calculate square corners
-        # Southwestern corner: (easting, northing)
-        # Northeastern corner: (easting + square_size, northing + square_size)
-        square = Rectangle(
-            (easting, northing),  # bottom-left corner (x, y)
-            square_size,  # width
-            square_size,  # height
-            facecolor=color,
-            edgecolor='none'
+        square_keys.append(square_key)
+        square_colors.append(color)
+
+    # Parse all keys (e.g., "668:338", "67:34", "6789:3458") in bulk with
+    # NumPy string kernels instead of per-key split()/int() in the
+    # interpreter; grid size follows from the digit count
+    # (2 digits = 100km, 3 digits = 10km, 4 digits = 1km)
+    offsets = np.empty((0, 2), dtype=np.float64)
+    sizes = np.empty(0, dtype=np.float64)
+    if square_keys:
+        keys = np.asarray(square_keys)
+        parts = np.char.partition(keys, ':')
+        northing_strs = parts[:, 0]
+        easting_strs = parts[:, 2]
+
+        northing_digits = np.char.str_len(northing_strs)
+        easting_digits = np.char.str_len(easting_strs)
+
+        # A missing ':' leaves an empty easting part, which isdecimal
+        # rejects; isdecimal (unlike isdigit) also rejects digit forms such
+        # as superscripts that the int64 conversion below cannot parse
+        numeric = np.char.isdecimal(northing_strs) & np.char.isdecimal(easting_strs)
+        matched = northing_digits == easting_digits
+        supported = (northing_digits >= 2) & (northing_digits <= 4)
+        valid = numeric & matched & supported
+
+        for key in keys[~numeric]:
+            print(f"Warning: Invalid square key format: {key}. Expected 'northing:easting'")
+        for key in keys[numeric & ~matched]:
+            print(f"Warning: Mismatched coordinate digits in {key}. Expected same number of digits.")
+        for key in keys[numeric & matched & ~supported]:
+            print(f"Warning: Unsupported coordinate format: {key}. Expected 2, 3, or 4 digits per coordinate.")
+
+        digits = northing_digits[valid]
+        multipliers = np.where(digits == 2, 100000, np.where(digits == 3, 10000, 1000))
+        sizes = multipliers.astype(np.float64)
+        if resolution_km == 50:
+            # 50km squares: "670:345" -> multiply by 10000, size is 50000
+            sizes = np.where(digits == 3, 50000.0, sizes)
+
+        northings = northing_strs[valid].astype(np.int64) * multipliers
+        eastings = easting_strs[valid].astype(np.int64) * multipliers
+        square_colors = np.asarray(square_colors)[valid]
+
+        # Collapse cells that resolve to the same corner and size (possible
+        # when upstream aggregation mixes key spellings) so each square is
+        # filled once; the last occurrence wins, matching dict overwrites.
+        # Coordinates fit in 23 bits and sizes are whole kilometers, so the
+        # triple packs into one int64 key
+        cell_keys = (northings << 30) | (eastings << 7) | (sizes.astype(np.int64) // 1000)
+        _, last_idx = np.unique(cell_keys[::-1], return_index=True)
+        if len(last_idx) < len(cell_keys):
+            keep = np.sort((len(cell_keys) - 1) - last_idx)
+            northings = northings[keep]
+            eastings = eastings[keep]
+            sizes = sizes[keep]
+            square_colors = square_colors[keep]
+
+        # Cull squares entirely outside the border bounding box; Agg would
+        # only clip them away after paying the fill cost
+        keep = ((eastings + sizes > bx_min) & (eastings < bx_max)
+                & (northings + sizes > by_min) & (northings < by_max))
+        if not keep.all():
+            northings = northings[keep]
+            eastings = eastings[keep]
+            sizes = sizes[keep]
+            square_colors = square_colors[keep]
+
+        # Southwestern corners as (easting, northing)
+        offsets = np.column_stack([eastings, northings]).astype(np.float64)
+
+    if len(offsets):
+        # Build an (N, 4, 2) vertex array and add all squares in one artist
+        unit_square = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float64)
+        verts = offsets[:, np.newaxis, :] + unit_square[np.newaxis] * sizes[:, np.newaxis, np.newaxis]
+        # Colors repeat heavily across squares (the legend dedup relies on
+        # that), so store one small palette index per square and map it
+        # through a ListedColormap instead of one hex string per square
+        palette, color_idx = np.unique(square_colors, return_inverse=True)
+        # Parse each unique hex string exactly once up front; downstream
+        # only ever sees the (K, 4) float RGBA array
+        palette = to_rgba_array(palette)
+        # rasterized=True keeps the cell overlay a single composited image
+        # even on vector backends (SVG/PDF), while borders stay vector
+        # Axis-aligned solid fills gain nothing from antialiasing; snapping
+        # to pixel boundaries also skips sub-pixel edge blending
+        squares = PolyCollection(
+            verts, cmap=ListedColormap(palette), edgecolors='none',
+            antialiased=False, rasterized=True, zorder=1
         )
-        ax.add_patch(square)
-    
+        squares.set_snap(True)
+        squares.set_array(color_idx.astype(np.min_scalar_type(len(palette) - 1)))
+        squares.set_clim(0, len(palette) - 1)
+        ax.add_collection(squares)
+
     # Create legend
     if legend_items:
-        # Sort legend items by value for better readability
-        sorted_items = sorted(legend_items.items(), key=lambda x: x[1] if x[1] is not None else float('-inf'))
-        
+        # Sort legend items by value for better readability (None first)
+        legend_colors = list(legend_items.keys())
+        legend_values = list(legend_items.values())
+        vals = np.fromiter(
+            (v if v is not None else -np.inf for v in legend_values),
+            dtype=np.float64, count=len(legend_values),
+        )
+        order = np.argsort(vals, kind='stable')
+
         # Limit legend to at most half of vertical space
         # Estimate ~22 pixels per legend entry (based on default matplotlib font)
         pixels_per_entry = 22
         max_legend_height = (figsize[1] * dpi) / 2
         max_entries = int(max_legend_height / pixels_per_entry)
         max_entries = max(2, max_entries)  # At least show 2 entries (min and max)
+
+        # Subsample if too many items: evenly spaced picks always including
+        # the first (min value) and last (max value); np.unique drops any
+        # duplicate indices and keeps them ordered
+        if len(order) > max_entries:
+            picks = np.unique(np.linspace(0, len(order) - 1, max_entries).astype(np.intp))
+            order = order[picks]
+
+        sorted_items = [(legend_colors[i], legend_values[i]) for i in order]
         
-        # Subsample if too many items
-        if len(sorted_items) > max_entries:
-            # Pick evenly distributed indices, always including first and last
-            indices = [0]  # Always include first (min value)
-            if max_entries > 2:
-                step = (len(sorted_items) - 1) / (max_entries - 1)
-                for i in range(1, max_entries - 1):
-                    indices.append(int(i * step))
-            indices.append(len(sorted_items) - 1)  # Always include last (max value)
-            # Remove duplicates while preserving order
-            indices = list(dict.fromkeys(indices))
-            sorted_items = [sorted_items[i] for i in indices]
-        
-        # Create legend handles and labels
-        legend_handles = []
-        legend_labels = []
-        for color, value in sorted_items:
-            patch = Patch(facecolor=color, edgecolor='black', linewidth=0.5)
-            legend_handles.append(patch)
-            # Format value for display
-            if value is not None:
-                if isinstance(value, float):
-                    label = f"{value:.2f}" if value != int(value) else f"{int(value)}"
-                else:
-                    label = str(value)
-            else:
-                label = "N/A"
-            legend_labels.append(label)
+        # Create legend handles and labels; format all values in one pass
+        # (whole numbers without decimals, others as %.2f, None as "N/A")
+        legend_handles = [
+            Patch(facecolor=color, edgecolor='black', linewidth=0.5)
+            for color, _ in sorted_items
+        ]
+        sel_vals = vals[order]
+        labels = np.full(len(sel_vals), "N/A", dtype=object)
+        finite = np.isfinite(sel_vals)  # None entries were mapped to -inf
+        finite_vals = sel_vals[finite]
+        finite_labels = np.char.mod('%.2f', finite_vals).astype(object)
+        whole = np.mod(finite_vals, 1) == 0
+        finite_labels[whole] = finite_vals[whole].astype(np.int64).astype(str)
+        labels[finite] = finite_labels
+        legend_labels = labels.tolist()
         
-        # Add legend to the top left corner
-        ax.legend(legend_handles, legend_labels, loc='upper left', framealpha=0.9, 
+        # Add legend to the top left corner. Keep loc explicit and never
+        # 'best': with thousands of squares, 'best' probes every artist
+        # for overlap on each draw, and it runs twice per render
+        ax.legend(legend_handles, legend_labels, loc='upper left',
+                 bbox_to_anchor=(0.0, 1.0), framealpha=0.9,
                  edgecolor='black', facecolor='white', frameon=True)
     
     # Remove axes for a clean look
     ax.axis('off')
-    
+
     # Set equal aspect ratio and adjust limits
     ax.set_aspect('equal')
-    
+
+    # Fix the extent from the data instead of using bbox_inches='tight',
+    # which triggers a second full draw just to measure the bounding box
+    x_min, x_max = bx_min, bx_max
+    y_min, y_max = by_min, by_max
+    if len(offsets):
+        x_min = min(x_min, (offsets[:, 0]).min())
+        x_max = max(x_max, (offsets[:, 0] + sizes).max())
+        y_min = min(y_min, (offsets[:, 1]).min())
+        y_max = max(y_max, (offsets[:, 1] + sizes).max())
+    x_margin = 0.01 * (x_max - x_min)
+    y_margin = 0.01 * (y_max - y_min)
+    ax.set_xlim(x_min - x_margin, x_max + x_margin)
+    ax.set_ylim(y_min - y_margin, y_max + y_margin)
+    fig.subplots_adjust(left=0, bottom=0, right=1, top=1)
+
     # Ensure output directory exists
     output_dir = os.path.dirname(output_file)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir, exist_ok=True)
-    
-    # Save the figure
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=dpi, bbox_inches='tight', facecolor='white')
-    plt.close(fig)  # Close the figure to free memory
+
+    # Draw once and write the canvas PNG directly, skipping savefig's
+    # backend dispatch; the figure stays cached for the next render
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    # Low zlib effort: these maps compress to nearly the same size at
+    # level 1, at a fraction of the default level-6 encode time
+    fig.canvas.print_png(output_file, pil_kwargs={'compress_level': 1, 'optimize': False})
     
     print(f"Map saved to {output_file}")
     return True